@@ -1,8 +1,2 @@
-import sqlite3
-
-
-def upgrade(db_path):
-    with sqlite3.connect(db_path) as conn:
-        db_cursor = conn.cursor()
-        db_cursor.execute("ALTER TABLE auto_response ADD COLUMN type varchar(16) DEFAULT 'text'")
-        conn.commit()
+def upgrade(db_cursor):
+    db_cursor.execute("ALTER TABLE auto_response ADD COLUMN type varchar(16) DEFAULT 'text'")
@@ -0,0 +1,6 @@
+def upgrade(db_cursor):
+    # Minimum length of plain ASCII text sent to the AI detector without links or contacts.
+    # Defaults to 0 (pre-filter off) so existing deployments keep full AI coverage until opted in
+    db_cursor.execute("""
+        INSERT OR IGNORE INTO settings (key, value) VALUES ('ai_prefilter_min_length', '0');
+    """)
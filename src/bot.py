@@ -176,6 +176,17 @@ class TGBot:
         ai_enabled = enabled_flag != "disable"
         return api_key, api_base, model, ai_enabled
 
+    def _get_ai_prefilter_min_length(self) -> int:
+        """Fetch the AI pre-filter text length threshold from cache (0 disables it)."""
+        raw = self.cache.get("setting_ai_prefilter_min_length")
+        if raw in (None, ""):
+            return 0
+        try:
+            return max(0, int(raw))
+        except (TypeError, ValueError):
+            logger.error(_("Invalid AI pre-filter length: {}").format(raw))
+            return 0
+
     def _get_spam_forward_chat_id(self) -> Optional[int]:
         """Get external spam forward chat ID if configured."""
         raw = self.cache.get("setting_spam_forward_chat_id")
@@ -196,6 +207,8 @@ class TGBot:
         # Remove existing detector if present
         if self.ai_detector:
             self.spam_detector_manager.unregister_detector(self.ai_detector)
+            # Deferred until detections still running on worker threads complete
+            self.ai_detector.close()
             self.ai_detector = None
 
         api_key, api_base, model, ai_enabled = self._get_ai_settings()
@@ -213,7 +226,8 @@ class TGBot:
                 api_key=api_key,
                 base_url=api_base,
                 model=model,
-                bot=self.bot
+                bot=self.bot,
+                min_text_length=self._get_ai_prefilter_min_length()
             )
             self.spam_detector_manager.register_detector(self.ai_detector)
             logger.info(_("AI spam detector enabled"))
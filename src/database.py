@@ -7,6 +7,7 @@ import threading
 from traceback import print_exc
 
 from src.config import logger, _
+from src.utils.db_migrator import run_migrations
 
 
 class Database:
@@ -57,23 +58,19 @@ class Database:
         files = [f for f in os.listdir(db_migrate_dir) if f.endswith('.py')]
         files.sort(key=lambda x: int(x.split('_')[0]))
 
-        for file in files:
-            try:
+        try:
+            pending = []
+            for file in files:
                 if (version := int(file.split('_')[0])) > current_version:
-                    logger.info(_("Upgrading database to version {}").format(version))
                     module = importlib.import_module(f"db_migrate.{file[:-3]}")
-                    module.upgrade(self.db_path)
-                    db = self.get_connection()
-                    try:
-                        db_cursor = db.cursor()
-                        db_cursor.execute("UPDATE settings SET value = ? WHERE key = 'db_version'",
-                                          (str(version),))
-                    finally:
-                        db.close()
-            except Exception:
-                logger.error(_("Failed to upgrade database"))
-                print_exc()
-                exit(1)
+                    pending.append((version, module.upgrade))
+
+            if pending:
+                run_migrations(self.db_path, pending)
+        except Exception:
+            logger.error(_("Failed to upgrade database"))
+            print_exc()
+            exit(1)
 
     def get_setting(self, key: str):
         """Get a setting value from the database."""
@@ -635,8 +635,12 @@ class AdminHandler:
                 callback_data=json.dumps({"action": "disable_ai_detector"} if ai_enabled else {"action": "enable_ai_detector"})
             ),
         )
-        markup.add(types.InlineKeyboardButton("🧪" + _("Test AI Detection"),
-                                              callback_data=json.dumps({"action": "test_ai_detection"})))
+        markup.row(
+            types.InlineKeyboardButton("✂️" + _("Set Pre-filter Length"),
+                                       callback_data=json.dumps({"action": "set_ai_prefilter"})),
+            types.InlineKeyboardButton("🧪" + _("Test AI Detection"),
+                                       callback_data=json.dumps({"action": "test_ai_detection"})),
+        )
         markup.add(types.InlineKeyboardButton("⬅️" + _("Back"),
                                               callback_data=json.dumps({"action": "menu"})))
 
@@ -645,6 +649,16 @@ class AdminHandler:
         text += _("API Base: {}").format(api_base or _("Not set")) + "\n"
         text += _("API Key: {}").format(self._mask_api_key(api_key)) + "\n"
         text += _("Model: {}").format(model) + "\n"
+        prefilter_length = self.database.get_setting('ai_prefilter_min_length') or "0"
+        if prefilter_length == "0":
+            text += _("Pre-filter: {}").format(_("Disabled")) + "\n"
+        else:
+            text += _("Pre-filter: skip plain text under {} characters").format(prefilter_length) + "\n"
+        ai_detector = getattr(self.bot_instance, "ai_detector", None) if self.bot_instance else None
+        if ai_detector:
+            stats = ai_detector.get_stats()
+            text += _("Pre-filter stats: {} skipped, {} sent to AI").format(
+                stats["prefiltered"], stats["checked"]) + "\n"
         if ai_enabled and not ai_ready:
             text += _("AI detector is enabled but missing credentials.")
 
@@ -749,6 +763,38 @@ class AdminHandler:
                                               callback_data=json.dumps({"action": "ai_settings"})))
         self.bot.send_message(self.group_id, _("AI model updated."), reply_markup=markup)
 
+    def set_ai_prefilter(self, message: Message):
+        """Prompt admin to set the AI pre-filter text length."""
+        if not self.check_valid_chat(message):
+            return
+        msg = self.bot.send_message(
+            text=_("Please send the minimum length of plain text (without links or contacts) "
+                   "that is checked by AI. Send 0 to check every message.\n"
+                   "Send /cancel to cancel this operation."),
+            chat_id=self.group_id,
+            message_thread_id=None)
+        self.bot.register_next_step_handler(msg, self.save_ai_prefilter)
+
+    def save_ai_prefilter(self, message: Message):
+        """Save AI pre-filter text length."""
+        if not self.check_valid_chat(message):
+            return
+        if not isinstance(message.text, str) or message.text.startswith("/cancel"):
+            self.bot.send_message(self.group_id, _("Operation cancelled"))
+            return
+
+        value = message.text.strip()
+        if not value.isdigit():
+            msg = self.bot.send_message(self.group_id, _("Invalid number. Please try again:"))
+            self.bot.register_next_step_handler(msg, self.save_ai_prefilter)
+            return
+
+        self._persist_ai_setting("ai_prefilter_min_length", str(int(value)))
+        markup = types.InlineKeyboardMarkup()
+        markup.add(types.InlineKeyboardButton("⬅️" + _("Back"),
+                                              callback_data=json.dumps({"action": "ai_settings"})))
+        self.bot.send_message(self.group_id, _("AI pre-filter length updated."), reply_markup=markup)
+
     def disable_ai_detector(self, message: Message):
         """Disable AI spam detector without clearing credentials."""
         if not self.check_valid_chat(message):
@@ -837,7 +883,7 @@ class AdminHandler:
             return
 
         try:
-            is_spam, info = ai_detector.detect(message, context={"enable_ai": True})
+            is_spam, info = ai_detector.detect(message, context={"enable_ai": True, "skip_prefilter": True})
         except Exception as e:
             logger.error(_("AI test failed: {}").format(str(e)))
             self.bot.send_message(self.group_id, _("AI detection failed: {}").format(str(e)))
@@ -80,6 +80,8 @@ class CallbackHandler:
                 self.admin_handler.set_ai_api_base(call.message)
             case "set_ai_model":
                 self.admin_handler.set_ai_model(call.message)
+            case "set_ai_prefilter":
+                self.admin_handler.set_ai_prefilter(call.message)
             case "disable_ai_detector":
                 self.admin_handler.disable_ai_detector(call.message)
             case "enable_ai_detector":
@@ -0,0 +1,49 @@
+"""Database migration runner."""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from src.config import logger, _
+
+
+def run_migrations(db_path: str, migrations: List[Tuple[int, Callable]]):
+    """
+    Apply pending migrations inside a single SQLite transaction.
+
+    Running every upgrade on one connection and one transaction avoids a
+    separate commit (and fsync) per migration. If any migration fails, the
+    whole batch is rolled back and the database stays at its previous version.
+
+    Args:
+        db_path: Path to the SQLite database
+        migrations: (version, upgrade) pairs in ascending version order; each
+            upgrade receives the shared cursor and must not commit on its own
+    """
+    conn = sqlite3.connect(
+        db_path,
+        timeout=30.0,
+        isolation_level=None  # Transactions are managed explicitly below
+    )
+    try:
+        db_cursor = conn.cursor()
+        # WAL only syncs on checkpoint with synchronous=NORMAL, so the single
+        # commit below is cheap while the database stays crash-safe
+        db_cursor.execute('PRAGMA journal_mode=WAL')
+        db_cursor.execute('PRAGMA synchronous=NORMAL')
+        db_cursor.execute('PRAGMA busy_timeout=30000')
+
+        db_cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for version, upgrade in migrations:
+                logger.info(_("Upgrading database to version {}").format(version))
+                upgrade(db_cursor)
+                db_cursor.execute("UPDATE settings SET value = ? WHERE key = 'db_version'",
+                                  (str(version),))
+            db_cursor.execute("COMMIT")
+        except Exception:
+            # Some errors already roll the transaction back on their own
+            if conn.in_transaction:
+                db_cursor.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
@@ -1,24 +1,93 @@
 """AI-based spam detector using an OpenAI-compatible API with optional images."""
 
 import base64
-import json
-import mimetypes
+import hashlib
+import io
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from typing import List, Optional, Tuple
 
 import httpx
-from telebot import TeleBot
+import orjson
+from PIL import Image
+from telebot import TeleBot, apihelper
 from telebot.types import File, Message
 
 from src.config import logger, _
 from src.utils.spam_detector_base import SpamDetectorBase
 
+_SYSTEM_PROMPT = (
+    "You are a strict spam filter for a Telegram relay bot. "
+    "Return JSON with fields: spam (boolean), confidence (0-1), reason (short text). "
+    "Mark spam when the message or attached images are unsolicited ads, phishing, scams, or mass promotion. "
+    "Only return the JSON object. Do not return any other text."
+)
+
+_BATCH_SYSTEM_PROMPT = (
+    "You are a strict spam filter for a Telegram relay bot. "
+    "You will receive several numbered messages. "
+    "Return JSON of the form {\"results\": [{\"id\": 1, \"spam\": true, \"confidence\": 0.9, "
+    "\"reason\": \"short text\"}]} with exactly one entry per message id. "
+    "Mark spam when the message or attached images are unsolicited ads, phishing, scams, or mass promotion. "
+    "Only return the JSON object. Do not return any other text."
+)
+
+_NO_TEXT_PROMPT = "No user text was provided. Review only the attached images for spam."
+
+# Links, handles, contact apps and phone/QQ numbers are what short spam messages rely on.
+# Any non-ASCII text (CJK, other scripts, emoji) is also sent on, since a character
+# count says little about how much a short CJK message can pitch.
+_SUSPICIOUS_RE = re.compile(
+    r"https?://|t\.me/|@\w{5,}|\d{5,}|qq|vx|wx|whatsapp|[^\x00-\x7f]",
+    re.IGNORECASE,
+)
+
+# Markdown code fence (optional language tag) some models wrap their JSON in
+_FENCE_RE = re.compile(r"^```[\w-]*\s*(.*?)\s*(?:```)?$", re.DOTALL)
+
+# Rate limiting and transient upstream errors that are worth retrying
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _while_open(fallback):
+    """
+    Track a call as in flight so close() waits for it before releasing resources.
+
+    Calls made after the detector has been closed return fallback(*args, **kwargs)
+    instead of touching the closed HTTP client or executor.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not self._acquire():
+                return fallback(*args, **kwargs)
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self._release()
+
+        return wrapper
+
+    return decorator
+
 
 class OpenAISpamDetector(SpamDetectorBase):
     """Spam detector that delegates classification to an OpenAI-compatible model."""
 
     def __init__(self, api_key: str, base_url: str, model: str = "gpt-3.5-turbo",
                  threshold: float = 0.5, request_timeout: float = 15.0,
-                 bot: Optional[TeleBot] = None):
+                 bot: Optional[TeleBot] = None, batch_size: int = 10,
+                 cache_size: int = 10_000, inline_images: bool = True,
+                 min_text_length: int = 0, max_attempts: int = 3,
+                 failure_threshold: int = 5, cooldown: float = 60.0,
+                 max_image_side: int = 512, file_cache_bytes: int = 64 * 1024 * 1024,
+                 json_mode: bool = True):
         self.api_key = api_key
         # Keep caller-supplied base as-is (OpenAI: https://api.openai.com/v1,
         # Gemini-OpenAI: https://generativelanguage.googleapis.com/v1beta/openai)
@@ -28,6 +97,104 @@ class OpenAISpamDetector(SpamDetectorBase):
         self.request_timeout = request_timeout
         # TeleBot instance is needed for downloading images when doing multimodal checks
         self.bot = bot
+        # When False, images are passed to the model as Telegram file URLs instead of
+        # being downloaded and base64-inlined. The URL embeds the bot token, so only
+        # disable this for endpoints that are trusted with it.
+        self.inline_images = inline_images
+        # LRU of downloaded Telegram files bounded by total size, so rechecks skip the download
+        self.file_cache_bytes = file_cache_bytes
+        self._file_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._file_cache_size = 0
+        self._file_cache_lock = threading.Lock()
+        # Fetches the images of one message in parallel (photo + image document)
+        self._image_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="AIImageFetch")
+        # Inlined images are downscaled to this size; spam cues survive and payloads shrink
+        self.max_image_side = max_image_side
+        # Plain text shorter than this, without links/handles/contacts, skips the model (0 disables)
+        self.min_text_length = max(0, min_text_length)
+        # Pre-filter counters so admins can judge how much traffic the heuristic drops
+        self._stats = {"prefiltered": 0, "checked": 0}
+        self._stats_lock = threading.Lock()
+        # Maximum number of messages packed into one request by detect_many()
+        self.batch_size = max(1, batch_size)
+        # LRU of model verdicts keyed by content hash; spam campaigns repeat the same payload
+        self.cache_size = cache_size
+        self._result_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Retry transient failures, then stop calling the API for `cooldown` seconds once
+        # `failure_threshold` requests in a row have failed (circuit breaker)
+        self.max_attempts = max(1, max_attempts)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._breaker_lock = threading.Lock()
+        # Request pieces that never change for the life of the detector
+        self._system_msg = {"role": "system", "content": [{"type": "text", "text": _SYSTEM_PROMPT}]}
+        self._batch_system_msg = {"role": "system", "content": [{"type": "text", "text": _BATCH_SYSTEM_PROMPT}]}
+        # Ask the endpoint for a guaranteed JSON object (response_format); turned off
+        # automatically if the endpoint reports that it does not support the parameter
+        self.json_mode = json_mode
+        self._payload_template = self._build_payload_template(json_mode)
+        self._json_mode_lock = threading.Lock()
+        # Shared client keeps connections alive (and multiplexed over HTTP/2) across checks.
+        # httpx.Client is thread-safe, so concurrent MessageWorker threads overlap their
+        # requests on the same pool instead of serializing behind one another.
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            http2=True,
+            timeout=self.request_timeout,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+        )
+        # In-flight detections; close() defers releasing resources until they finish
+        self._in_flight = 0
+        self._closing = False
+        self._closed = False
+        self._lifecycle_lock = threading.Lock()
+
+    def close(self):
+        """
+        Close the underlying HTTP client and image download threads.
+
+        Detections already running on other threads are allowed to finish; the
+        last one to complete releases the resources.
+        """
+        with self._lifecycle_lock:
+            self._closing = True
+            release = self._in_flight == 0 and not self._closed
+            if release:
+                self._closed = True
+        if release:
+            self._release_resources()
+
+    def _acquire(self) -> bool:
+        """Register an in-flight call unless the detector is already closed."""
+        with self._lifecycle_lock:
+            if self._closed:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release(self):
+        """Finish an in-flight call and release resources if close() is pending."""
+        with self._lifecycle_lock:
+            self._in_flight -= 1
+            release = self._closing and self._in_flight == 0 and not self._closed
+            if release:
+                self._closed = True
+        if release:
+            self._release_resources()
+
+    def _release_resources(self):
+        self._client.close()
+        self._image_executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def get_name(self) -> str:
         return "AI Detector"
@@ -42,44 +209,325 @@ class OpenAISpamDetector(SpamDetectorBase):
 
         return True
 
+    @_while_open(lambda message, *args, **kwargs: (False, None))
     def detect(self, message: Message, context: Optional[dict] = None) -> Tuple[bool, Optional[dict]]:
         """Use chat completion endpoint to classify spam."""
         if not self.is_enabled(context):
             return False, None
 
-        if not (message.text or message.caption or self._has_images(message)):
+        # Callers such as the admin AI test can ask for the model to be consulted directly
+        skip_prefilter = bool(context and context.get("skip_prefilter"))
+        if not self._needs_model_check(message, skip_prefilter):
             return False, None
 
         user_text = message.text or message.caption or ""
         image_parts = self._extract_image_parts(message)
-        messages = self._build_messages(user_text, image_parts)
+
+        cache_key = self._cache_key(user_text, image_parts)
+        result = self._get_cached_result(cache_key)
+        if result is None:
+            messages = self._build_messages(user_text, image_parts)
+            result = self._request_json(messages)
+            if result is None:
+                return False, None
+            self._store_cached_result(cache_key, result)
+
+        return self._to_verdict(result)
+
+    @_while_open(lambda messages, *args, **kwargs: [(False, None)] * len(messages))
+    def detect_many(self, messages: List[Message],
+                    context: Optional[dict] = None) -> List[Tuple[bool, Optional[dict]]]:
+        """
+        Classify several messages, packing up to batch_size of them per request.
+
+        The system prompt is sent once per batch instead of once per message.
+        Results are returned in the same order as the input messages.
+        """
+        verdicts: List[Tuple[bool, Optional[dict]]] = [(False, None)] * len(messages)
+        if not self.is_enabled(context):
+            return verdicts
+
+        candidates = [index for index, message in enumerate(messages)
+                      if self._needs_model_check(message)]
+
+        for start in range(0, len(candidates), self.batch_size):
+            chunk = candidates[start:start + self.batch_size]
+            entries = [
+                (messages[index].text or messages[index].caption or "",
+                 self._extract_image_parts(messages[index]))
+                for index in chunk
+            ]
+            result = self._request_json(self._build_batch_messages(entries))
+            if result is None:
+                continue
+
+            # Map numbered results back to their position in the chunk
+            for item in result.get("results") or []:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    position = int(item.get("id")) - 1
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= position < len(chunk):
+                    verdicts[chunk[position]] = self._to_verdict(item)
+
+        return verdicts
+
+    @_while_open(lambda messages, *args, **kwargs: [(False, None)] * len(messages))
+    def detect_batch_async(self, messages: List[Message], context: Optional[dict] = None,
+                           max_wait: float = 3600.0) -> List[Tuple[bool, Optional[dict]]]:
+        """
+        Classify messages through the Batch API for non-latency-critical rechecks.
+
+        Requests are uploaded as a JSONL file and submitted to /batches, which
+        is billed at a discount and does not count against realtime rate limits.
+        Blocks until the batch finishes or max_wait seconds elapse; messages
+        without a usable result are reported as not spam.
+        """
+        verdicts: List[Tuple[bool, Optional[dict]]] = [(False, None)] * len(messages)
+        if not self.is_enabled(context):
+            return verdicts
+
+        lines = []
+        for index, message in enumerate(messages):
+            if not (message.text or message.caption or self._has_images(message)):
+                continue
+            user_text = message.text or message.caption or ""
+            lines.append(orjson.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    **self._payload_template,
+                    "messages": self._build_messages(user_text, self._extract_image_parts(message)),
+                },
+            }))
+        if not lines:
+            return verdicts
 
         try:
-            response = httpx.post(
-                f"{self.base_url}/chat/completions",
-                headers={"Authorization": f"Bearer {self.api_key}"},
+            upload = self._client.post(
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": ("spam_batch.jsonl", b"\n".join(lines), "application/jsonl")},
+            )
+            upload.raise_for_status()
+            response = self._client.post(
+                "/batches",
                 json={
-                    "model": self.model,
-                    "temperature": 0,
-                    "messages": messages,
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h",
                 },
-                timeout=self.request_timeout,
             )
             response.raise_for_status()
+            batch = self._wait_for_batch(response.json()["id"], max_wait)
+            if not batch or not batch.get("output_file_id"):
+                return verdicts
+
+            output = self._client.get(f"/files/{batch['output_file_id']}/content")
+            output.raise_for_status()
         except Exception as e:
-            logger.error(_("AI spam detection request failed: {}").format(str(e)))
-            return False, None
+            logger.error(_("AI spam detection batch request failed: {}").format(str(e)))
+            return verdicts
+
+        for line in output.content.splitlines():
+            try:
+                entry = orjson.loads(line)
+                index = int(entry["custom_id"])
+                body = (entry.get("response") or {}).get("body") or {}
+            except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(messages):
+                continue
+
+            content = self._extract_completion_content(body)
+            if content is None:
+                continue
+            try:
+                result = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(result, dict):
+                verdicts[index] = self._to_verdict(result)
+
+        return verdicts
+
+    def _wait_for_batch(self, batch_id: str, max_wait: float) -> Optional[dict]:
+        """Poll a batch with exponential backoff until it reaches a final state."""
+        deadline = time.monotonic() + max_wait
+        delay = 2.0
+        while True:
+            response = self._client.get(f"/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+            status = batch.get("status")
+            if status == "completed":
+                return batch
+            if status in ("failed", "expired", "cancelled"):
+                logger.error(_("AI spam detection batch {} ended with status {}").format(batch_id, status))
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(_("AI spam detection batch {} did not finish in time").format(batch_id))
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 60.0)
+
+    def _needs_model_check(self, message: Message, skip_prefilter: bool = False) -> bool:
+        """Cheap local check that lets trivial chatter skip the API call."""
+        user_text = message.text or message.caption or ""
+        if not user_text and not self._has_images(message):
+            return False
+        if skip_prefilter:
+            return True
+
+        needed = (self._has_images(message)
+                  or len(user_text) >= self.min_text_length
+                  or bool(_SUSPICIOUS_RE.search(user_text)))
+        with self._stats_lock:
+            self._stats["checked" if needed else "prefiltered"] += 1
+        return needed
+
+    def get_stats(self) -> dict:
+        """Return a snapshot of the pre-filter counters."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _cache_key(self, user_text: str, image_parts: List[dict]) -> bytes:
+        """Hash the model name and message content into a verdict cache key."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.model.encode("utf-8"))
+        digest.update(b"|")
+        digest.update(user_text.encode("utf-8"))
+        for part in image_parts:
+            digest.update(b"|")
+            digest.update(part["image_url"]["url"].encode("utf-8"))
+        return digest.digest()
+
+    def _get_cached_result(self, key: bytes) -> Optional[dict]:
+        """Return a cached model verdict and mark it as recently used."""
+        with self._cache_lock:
+            result = self._result_cache.get(key)
+            if result is not None:
+                self._result_cache.move_to_end(key)
+            return result
+
+    def _store_cached_result(self, key: bytes, result: dict):
+        """Remember a model verdict, evicting the least recently used entries."""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._result_cache[key] = result
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > self.cache_size:
+                self._result_cache.popitem(last=False)
+
+    def _request_json(self, messages: List[dict]) -> Optional[dict]:
+        """Send a chat completion request and decode the model's JSON answer."""
+        # Fail fast while the circuit is open instead of waiting on a dead endpoint
+        if time.monotonic() < self._open_until:
+            return None
+
+        # Snapshot the template so a concurrent JSON mode fallback cannot change it mid-request
+        template = self._payload_template
+        payload = orjson.dumps({**template, "messages": messages})
+        attempt = 0
+        while True:
+            try:
+                response = self._client.post(
+                    "/chat/completions",
+                    content=payload,
+                    headers={"Content-Type": "application/json"},
+                )
+                response.raise_for_status()
+                break
+            except Exception as e:
+                if "response_format" in template and self._rejects_json_mode(e):
+                    logger.error(_("AI endpoint rejected JSON mode, retrying without it: {}").format(str(e)))
+                    self._disable_json_mode()
+                    template = self._build_payload_template(False)
+                    payload = orjson.dumps({**template, "messages": messages})
+                    continue
+
+                retryable = isinstance(e, httpx.TransportError) or (
+                    isinstance(e, httpx.HTTPStatusError) and e.response.status_code in _RETRY_STATUSES
+                )
+                if not retryable or attempt >= self.max_attempts - 1:
+                    logger.error(_("AI spam detection request failed: {}").format(str(e)))
+                    self._record_failure()
+                    return None
+                time.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+
+        self._record_success()
 
         content = self._extract_content(response)
         if content is None:
-            return False, None
+            return None
 
         try:
-            result = json.loads(content)
-        except json.JSONDecodeError:
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            result = None
+        if not isinstance(result, dict):
             logger.error(_("AI spam detection returned non-JSON content"))
-            return False, None
+            return None
+
+        return result
 
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Honour a numeric Retry-After header, else back off exponentially with jitter."""
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                return min(max(float(retry_after), 0.0), 8.0)
+            except (TypeError, ValueError):
+                pass
+        return min(8, 2 ** attempt) + random.random() * 0.3
+
+    def _build_payload_template(self, json_mode: bool) -> dict:
+        """Build the request fields shared by every chat completion call."""
+        template = {"model": self.model, "temperature": 0}
+        if json_mode:
+            template["response_format"] = {"type": "json_object"}
+        return template
+
+    @staticmethod
+    def _rejects_json_mode(error: Exception) -> bool:
+        """Check whether a failed request was refused because of response_format."""
+        if not (isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 400):
+            return False
+        # Other 400s (bad image, context too long, invalid key) must not disable JSON mode
+        return "response_format" in error.response.text
+
+    def _disable_json_mode(self):
+        """Stop sending response_format to an endpoint that does not support it."""
+        with self._json_mode_lock:
+            self.json_mode = False
+            self._payload_template = self._build_payload_template(False)
+
+    def _record_success(self):
+        """Close the circuit after a successful request."""
+        with self._breaker_lock:
+            self._consecutive_failures = 0
+            self._open_until = 0.0
+
+    def _record_failure(self):
+        """Count a failed request and open the circuit once the threshold is reached."""
+        with self._breaker_lock:
+            self._consecutive_failures += 1
+            # The counter is kept while open, so one more failure after the cooldown reopens it
+            if self._consecutive_failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self.cooldown
+                logger.error(_("AI spam detection paused for {} seconds after {} consecutive failures").format(
+                    self.cooldown, self._consecutive_failures))
+
+    def _to_verdict(self, result: dict) -> Tuple[bool, Optional[dict]]:
+        """Apply the confidence threshold to a single model verdict."""
         spam_flag = bool(result.get("spam"))
         confidence = self._safe_confidence(result.get("confidence"))
 
@@ -96,7 +544,15 @@ class OpenAISpamDetector(SpamDetectorBase):
     def _extract_content(self, response: httpx.Response) -> Optional[str]:
         """Extract the text content from an OpenAI-compatible response."""
         try:
-            data = response.json()
+            data = orjson.loads(response.content)
+        except Exception as e:
+            logger.error(_("Failed to parse AI spam detection response: {}").format(str(e)))
+            return None
+        return self._extract_completion_content(data)
+
+    def _extract_completion_content(self, data: dict) -> Optional[str]:
+        """Extract the text content from a decoded chat completion body."""
+        try:
             choices = data.get("choices") or []
             if not choices:
                 return None
@@ -123,39 +579,29 @@ class OpenAISpamDetector(SpamDetectorBase):
             if isinstance(content, str):
                 stripped = content.strip()
                 # Handle optional fenced code blocks
-                if stripped.startswith("```"):
-                    stripped = stripped.strip("`")
-                    if "\n" in stripped:
-                        stripped = "\n".join(stripped.split("\n")[1:])
-                return stripped
+                fenced = _FENCE_RE.match(stripped)
+                return fenced.group(1) if fenced else stripped
         except Exception as e:
             logger.error(_("Failed to parse AI spam detection response: {}").format(str(e)))
         return None
 
     def _build_messages(self, user_text: str, image_parts: List[dict]):
         """Build chat messages compatible with OpenAI/Gemini OpenAI endpoints."""
-        system_text = (
-            "You are a strict spam filter for a Telegram relay bot. "
-            "Return JSON with fields: spam (boolean), confidence (0-1), reason (short text). "
-            "Mark spam when the message or attached images are unsolicited ads, phishing, scams, or mass promotion. "
-            "Only return the JSON object. Do not return any other text."
-        )
-        def _as_blocks(text: str):
-            return [{"type": "text", "text": text}]
+        user_blocks = [{"type": "text", "text": user_text or _NO_TEXT_PROMPT}]
+        if image_parts:
+            user_blocks.extend(image_parts)
 
-        user_blocks = []
-        if user_text:
-            user_blocks.extend(_as_blocks(user_text))
-        else:
-            user_blocks.extend(_as_blocks("No user text was provided. Review only the attached images for spam."))
+        return [self._system_msg, {"role": "user", "content": user_blocks}]
 
-        if image_parts:
+    def _build_batch_messages(self, entries: List[Tuple[str, List[dict]]]):
+        """Build one chat request that classifies several numbered messages."""
+        user_blocks = []
+        for number, (user_text, image_parts) in enumerate(entries, start=1):
+            user_blocks.append({"type": "text", "text": f"Message {number}: {user_text or _NO_TEXT_PROMPT}"})
+            # Images stay right after the text of the message they belong to
             user_blocks.extend(image_parts)
 
-        return [
-            {"role": "system", "content": _as_blocks(system_text)},
-            {"role": "user", "content": user_blocks},
-        ]
+        return [self._batch_system_msg, {"role": "user", "content": user_blocks}]
 
     @staticmethod
     def _safe_confidence(raw_value) -> float:
@@ -174,29 +620,98 @@ class OpenAISpamDetector(SpamDetectorBase):
         return bool(doc and doc.mime_type and doc.mime_type.startswith("image/"))
 
     def _extract_image_parts(self, message: Message) -> List[dict]:
-        """Download and encode images as data URLs for multimodal models."""
+        """Build image parts (inline data URLs or remote file URLs) for multimodal models."""
         if not self.bot:
             return []
 
-        image_parts: List[dict] = []
+        tasks: List[Tuple[str, Optional[str]]] = []
 
         # Photos (use the highest resolution available)
         if getattr(message, "photo", None):
-            photo = message.photo[-1]
-            data = self._download_file(photo.file_id)
-            if data:
-                image_parts.append(self._to_image_part(data, "image/jpeg"))
+            tasks.append((message.photo[-1].file_id, "image/jpeg"))
 
         # Image documents (stickers/animations are ignored here)
         doc = getattr(message, "document", None)
         if doc and doc.mime_type and doc.mime_type.startswith("image/"):
-            data = self._download_file(doc.file_id)
-            if data:
-                image_parts.append(self._to_image_part(data, doc.mime_type))
+            tasks.append((doc.file_id, doc.mime_type))
+
+        if len(tasks) > 1:
+            # Avoid paying one Telegram round-trip after another
+            parts = list(self._image_executor.map(lambda task: self._image_part(*task), tasks))
+        else:
+            parts = [self._image_part(*task) for task in tasks]
+
+        return [part for part in parts if part]
+
+    def _image_part(self, file_id: str, mime_type: Optional[str]) -> Optional[dict]:
+        """Build a single image part, skipping the download when URLs are allowed."""
+        if not self.inline_images:
+            url = self._file_url(file_id)
+            return {"type": "image_url", "image_url": {"url": url}} if url else None
+
+        data = self._download_file(file_id)
+        if not data:
+            return None
+        data, mime_type = self._shrink_image(data, mime_type)
+        return self._to_image_part(data, mime_type)
 
-        return image_parts
+    def _shrink_image(self, data: bytes, mime_type: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Downscale large images to a JPEG thumbnail before they are inlined."""
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                if max(img.size) <= self.max_image_side:
+                    return data, mime_type
+                img.thumbnail((self.max_image_side, self.max_image_side))
+                buffer = io.BytesIO()
+                self._flatten_to_rgb(img).save(buffer, "JPEG", quality=75)
+        except Exception as e:
+            logger.error(_("Failed to resize image for AI spam detection: {}").format(str(e)))
+            return data, mime_type
+        return buffer.getvalue(), "image/jpeg"
+
+    @staticmethod
+    def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+        """Convert to RGB, compositing transparent images onto white instead of black."""
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            rgba = img.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+        return img.convert("RGB")
+
+    def _file_url(self, file_id: str) -> Optional[str]:
+        """Resolve the Telegram download URL of a file without fetching it."""
+        try:
+            file_info: File = self.bot.get_file(file_id)
+        except Exception as e:
+            logger.error(_("Failed to download file for AI spam detection: {}").format(str(e)))
+            return None
+        # Same URL telebot itself would download from
+        file_url = apihelper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}"
+        return file_url.format(self.bot.token, file_info.file_path)
 
     def _download_file(self, file_id: str) -> Optional[bytes]:
+        """Download file bytes from Telegram, reusing recently downloaded files."""
+        with self._file_cache_lock:
+            data = self._file_cache.get(file_id)
+            if data is not None:
+                self._file_cache.move_to_end(file_id)
+                return data
+
+        data = self._fetch_file(file_id)
+        if data is None or len(data) > self.file_cache_bytes:
+            return data
+
+        with self._file_cache_lock:
+            if file_id not in self._file_cache:
+                self._file_cache[file_id] = data
+                self._file_cache_size += len(data)
+                while self._file_cache_size > self.file_cache_bytes:
+                    _, evicted = self._file_cache.popitem(last=False)
+                    self._file_cache_size -= len(evicted)
+        return data
+
+    def _fetch_file(self, file_id: str) -> Optional[bytes]:
         """Download file bytes from Telegram."""
         try:
             file_info: File = self.bot.get_file(file_id)
@@ -208,11 +723,13 @@ class OpenAISpamDetector(SpamDetectorBase):
     @staticmethod
     def _to_image_part(data: bytes, mime_type: Optional[str]) -> dict:
         """Convert image bytes to OpenAI-compatible inline image."""
-        guessed_type = mime_type or mimetypes.guess_type("file")[0] or "image/jpeg"
-        encoded = base64.b64encode(data).decode("utf-8")
+        guessed_type = mime_type or "image/jpeg"
+        # Join as bytes and decode once instead of decoding the payload and formatting again
+        url = b"".join((b"data:", guessed_type.encode("ascii"), b";base64,",
+                        base64.b64encode(memoryview(data)))).decode("ascii")
         return {
             "type": "image_url",
             "image_url": {
-                "url": f"data:{guessed_type};base64,{encoded}"
+                "url": url
             }
         }